@@ -3,12 +3,31 @@ import csv
 import json
 import re
 import ipaddress
+import os
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import chain, islice
+from operator import itemgetter
 from pathlib import Path
 
+try:
+    import orjson  # Optional: faster anomalies.json serialization
+except ImportError:
+    orjson = None
+
 # --- Configuration ---
 INPUT_CSV = Path(__file__).parent / "inventory_raw.csv"
 OUTPUT_CSV = Path(__file__).parent / "inventory_clean.csv"
 ANOMALIES_JSON = Path(__file__).parent / "anomalies.json"
+VALIDATOR_CACHE_SIZE = 200_000  # Distinct values remembered per validator
+CHUNK_SIZE = 5_000  # Rows handed to a worker process at a time
+WORKERS = None  # Worker processes for row processing; None uses every CPU, 1 runs inline
+OUTPUT_BUFFER_SIZE = 1 << 20  # Bytes buffered before the clean CSV is flushed
+INPUT_FIELDS = (
+    "source_row_id", "ip", "hostname", "fqdn", "mac",
+    "owner", "device_type", "site", "notes"
+)
 TARGET_HEADERS = [
     "source_row_id",
     "ip", "ip_valid", "ip_version", "subnet_cidr", "reverse_ptr",
@@ -20,6 +39,29 @@ TARGET_HEADERS = [
     "normalization_steps"
 ]
 
+# Output rows are lists in TARGET_HEADERS order, written through these positions
+IDX = {name: i for i, name in enumerate(TARGET_HEADERS)}
+IDX_SOURCE_ROW_ID = IDX["source_row_id"]
+IDX_IP = IDX["ip"]
+IDX_IP_VALID = IDX["ip_valid"]
+IDX_IP_VERSION = IDX["ip_version"]
+IDX_SUBNET_CIDR = IDX["subnet_cidr"]
+IDX_REVERSE_PTR = IDX["reverse_ptr"]
+IDX_HOSTNAME = IDX["hostname"]
+IDX_HOSTNAME_VALID = IDX["hostname_valid"]
+IDX_FQDN = IDX["fqdn"]
+IDX_FQDN_CONSISTENT = IDX["fqdn_consistent"]
+IDX_MAC = IDX["mac"]
+IDX_MAC_VALID = IDX["mac_valid"]
+IDX_DEVICE_TYPE = IDX["device_type"]
+IDX_DEVICE_TYPE_CONFIDENCE = IDX["device_type_confidence"]
+IDX_OWNER = IDX["owner"]
+IDX_OWNER_EMAIL = IDX["owner_email"]
+IDX_OWNER_TEAM = IDX["owner_team"]
+IDX_SITE = IDX["site"]
+IDX_SITE_NORMALIZED = IDX["site_normalized"]
+IDX_NORMALIZATION_STEPS = IDX["normalization_steps"]
+
 # --- LLM Overrides ---
 LLM_CLASSIFICATIONS = {
     "6": {"device_type": "server", "confidence": 0.85},
@@ -39,12 +81,74 @@ LLM_OWNER_OVERRIDES = {
     "13": {"owner_team": "google-dns", "owner_email": None}
 }
 
+# --- Classification Rules ---
+# Keywords searched in device_type/notes, in priority order
+DEVICE_KEYWORDS = {
+    "server": ["server", "db host"],
+    "switch": ["switch"],
+    "router": ["router", "gw"],
+    "firewall": ["firewall"],
+    "printer": ["printer"],
+    "iot": ["iot", "camera"],
+    "access-point": ["access-point", "ap"],
+}
+
+# Keywords searched in the hostname for the cross-field consistency check
+HOSTNAME_KEYWORDS = {
+    "server": ["server", "srv"],
+    "router": ["router", "rtr", "gw"],
+    "switch": ["switch", "sw"],
+    "firewall": ["firewall", "fw"],
+    "printer": ["printer", "print"],
+    "access-point": ["ap"]
+}
+
+# Fields that must be populated after processing, with the action to recommend
+REQUIRED_FIELD_MESSAGES = {
+    "fqdn": "FQDN is missing. If possible, derive from hostname or investigate source system.",
+    "mac": "MAC address is missing. This is a critical field for DHCP services.",
+    "site_normalized": "Site information is missing."
+}
+
+# --- Compiled Patterns ---
+_EMAIL_RE = re.compile(r'[\w\.-]+@[\w\.-]+')
+_TEAM_RE = re.compile(r'\((.*?)\)')
+
+# MAC separators (':', '-', '.') to delete with str.translate
+_MAC_SEP_TABLE = str.maketrans('', '', ':-.')
+
+# Bytes permitted in an RFC 1123 hostname label, used as a deletion table
+_HOSTNAME_CHARS = b'-0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+
+def _compile_keyword_matcher(keyword_map):
+    """Compiles a {category: [keywords]} map into a single-pass regex matcher.
+
+    Every keyword becomes its own capture group, numbered in priority order and
+    wrapped in a lookahead so overlapping occurrences are all reported.
+    """
+    groups = []
+    categories = []
+    for category, keywords in keyword_map.items():
+        for keyword in keywords:
+            groups.append(f"({re.escape(keyword)})")
+            categories.append(category)
+    return re.compile(f"(?=(?:{'|'.join(groups)}))"), tuple(categories)
+
+_DEVICE_MATCHER = _compile_keyword_matcher(DEVICE_KEYWORDS)
+_HOSTNAME_MATCHER = _compile_keyword_matcher(HOSTNAME_KEYWORDS)
+
 # --- Data Processing Functions ---
 
+@lru_cache(maxsize=VALIDATOR_CACHE_SIZE)
 def validate_and_normalize_ip(ip_str):
-    """Validates and normalizes an IP address (v4 or v6), handling octal-like strings in v4."""
+    """Validates and normalizes an IP address (v4 or v6), handling octal-like strings in v4.
+
+    Alongside the normalized fields, reports whether a valid address is special
+    (loopback, link-local, multicast or unspecified) and so excluded from
+    duplicate detection.
+    """
     if not ip_str or not isinstance(ip_str, str):
-        return False, ip_str, None, None, None, "missing"
+        return False, ip_str, None, None, None, None, "missing"
     
     ip_str = ip_str.strip()
 
@@ -55,50 +159,81 @@ def validate_and_normalize_ip(ip_str):
                 ip_str = ip_str.split('%')[0]
             ip_obj = ipaddress.ip_address(ip_str)
             if ip_obj.version != 6:
-                 return False, original_ip_str, None, None, None, "mixed_notation"
-            return True, str(ip_obj.exploded), 6, "", ip_obj.reverse_pointer, "ok"
+                 return False, original_ip_str, None, None, None, None, "mixed_notation"
+            # The PTR name is the exploded address's nibbles in reverse order
+            exploded = ip_obj.exploded
+            reverse_ptr = '.'.join(reversed(exploded.replace(':', ''))) + '.ip6.arpa'
+            special = (ip_obj.is_loopback or ip_obj.is_link_local
+                       or ip_obj.is_multicast or ip_obj.is_unspecified)
+            return True, exploded, 6, "", reverse_ptr, special, "ok"
         except ValueError as e:
-            return False, original_ip_str, None, None, None, str(e)
+            return False, original_ip_str, None, None, None, None, str(e)
 
     parts = ip_str.split('.')
     if len(parts) != 4:
-        return False, ip_str, None, None, None, "wrong_part_count"
+        return False, ip_str, None, None, None, None, "wrong_part_count"
     
+    # Fast path: four plain decimal octets, range-checked with a single bit test
+    if ip_str.replace('.', '').isdigit():
+        try:
+            a, b, c, d = map(int, parts)
+        except ValueError:
+            pass  # Empty or non-decimal digit octets; classified below
+        else:
+            if not (a | b | c | d) >> 8:
+                return _ipv4_result(a, b, c, d)
+
+    # Slow path: check octet by octet to report why the address was rejected
     try:
-        canonical_parts = []
+        octets = []
         for p in parts:
             if not p.isdigit():
                 if not (p.startswith('-') and p[1:].isdigit()):
-                    return False, ip_str, None, None, None, "non_numeric"
+                    return False, ip_str, None, None, None, None, "non_numeric"
             v = int(p)
             if not 0 <= v <= 255:
-                return False, ip_str, None, None, None, "octet_out_of_range"
-            canonical_parts.append(str(v))
-        
-        normalized_ip = ".".join(canonical_parts)
-        ip_obj = ipaddress.ip_address(normalized_ip)
-        
-        subnet_cidr = ""
-        if ip_obj.is_private:
-            subnet_cidr = f"{'.'.join(str(ip_obj).split('.')[:3])}.0/24"
-            
-        return True, str(ip_obj), 4, subnet_cidr, ip_obj.reverse_pointer, "ok"
+                return False, ip_str, None, None, None, None, "octet_out_of_range"
+            octets.append(v)
+
+        return _ipv4_result(*octets)
 
     except (ValueError, TypeError):
-        return False, ip_str, None, None, None, "invalid_format"
+        return False, ip_str, None, None, None, None, "invalid_format"
+
+def _ipv4_result(a, b, c, d):
+    """Builds the validation result for a parsed IPv4 address from its octets."""
+    # Derive the text fields from the parsed octets rather than an IPv4Address
+    value = (a << 24) | (b << 16) | (c << 8) | d
+
+    # is_private follows the running Python's rules; results are cached per address
+    subnet_cidr = ""
+    if ipaddress.IPv4Address(value).is_private:
+        subnet_cidr = f"{a}.{b}.{c}.0/24"
+
+    # Loopback 127/8, link-local 169.254/16, multicast 224/4 or unspecified 0.0.0.0
+    special = a == 127 or (a == 169 and b == 254) or a >> 4 == 14 or not value
 
+    return True, f"{a}.{b}.{c}.{d}", 4, subnet_cidr, f"{d}.{c}.{b}.{a}.in-addr.arpa", special, "ok"
+
+@lru_cache(maxsize=VALIDATOR_CACHE_SIZE)
 def normalize_and_validate_mac(mac_str):
     """Validates and normalizes a MAC address to a canonical format."""
     if not mac_str or not isinstance(mac_str, str):
         return False, None, "missing"
 
-    cleaned_mac = re.sub(r'[:\-.]', '', mac_str).upper()
-    if len(cleaned_mac) == 12 and all(c in '0123456789ABCDEF' for c in cleaned_mac):
-        normalized_mac = ':'.join(cleaned_mac[i:i+2] for i in range(0, 12, 2))
-        return True, normalized_mac, "ok"
-    else:
-        return False, mac_str.strip(), "invalid_format"
+    cleaned_mac = mac_str.translate(_MAC_SEP_TABLE)
+    if len(cleaned_mac) == 12:
+        # fromhex skips whitespace between pairs, so also insist on 6 bytes out
+        try:
+            raw = bytes.fromhex(cleaned_mac)
+        except ValueError:
+            raw = b''
+        if len(raw) == 6:
+            return True, raw.hex(':').upper(), "ok"
+
+    return False, mac_str.strip(), "invalid_format"
 
+@lru_cache(maxsize=VALIDATOR_CACHE_SIZE)
 def validate_hostname(hostname_str):
     """Validates a hostname based on RFC 1123."""
     if not hostname_str or not isinstance(hostname_str, str):
@@ -107,7 +242,12 @@ def validate_hostname(hostname_str):
     hostname = hostname_str.strip()
     if len(hostname) > 253:
         return False, "too_long"
-    if not re.match(r'^(?!-)[A-Z0-9-]{1,63}(?<!-)$', hostname, re.IGNORECASE):
+    if not hostname.isascii() or not 1 <= len(hostname) <= 63:
+        return False, "invalid_chars"
+
+    # Deleting every permitted byte must leave nothing behind
+    b = hostname.encode('ascii')
+    if b[0] == 0x2D or b[-1] == 0x2D or b.translate(None, _HOSTNAME_CHARS):
         return False, "invalid_chars"
         
     return True, "ok"
@@ -117,299 +257,359 @@ def parse_owner(owner_str):
     if not owner_str or not isinstance(owner_str, str):
         return None, None
     
-    email_match = re.search(r'[\w\.-]+@[\w\.-]+', owner_str)
+    email_match = _EMAIL_RE.search(owner_str)
     email = email_match.group(0) if email_match else None
     
-    team_match = re.search(r'\((.*?)\)', owner_str)
+    team_match = _TEAM_RE.search(owner_str)
     team = team_match.group(1) if team_match else None
     
     return email, team
 
 def normalize_site(site_str):
-    """Normalizes site names using a programmatic rule."""
+    """Normalizes an already-stripped site name using a programmatic rule."""
     if not site_str or not isinstance(site_str, str):
         return None
-    return site_str.strip().lower().replace(' ', '-')
+    return site_str.lower().replace(' ', '-')
+
+def match_keyword(text, matcher):
+    """Returns the category of the highest-priority keyword found in text, or None."""
+    pattern, categories = matcher
+    best = None
+    for match in pattern.finditer(text):
+        if best is None or match.lastindex < best:
+            best = match.lastindex
+            if best == 1:
+                break
+    return categories[best - 1] if best else None
 
 def classify_device_type(device_type_str, notes_str):
     """Classifies device type using deterministic rules and flags ambiguous cases for LLM."""
     if not device_type_str and not notes_str:
         return None, 0.1, True # Needs LLM
 
-    # Combine device_type and notes for better context
-    context_str = f"{device_type_str or ''} {notes_str or ''}".lower().strip()
+    # Combine device_type and notes for better context. No keyword starts or ends
+    # with a space, so the joined text does not need stripping.
+    context_str = (device_type_str or '').lower() + ' ' + (notes_str or '').lower()
 
     # Simple keyword matching
-    device_map = {
-        "server": ["server", "db host"],
-        "switch": ["switch"],
-        "router": ["router", "gw"],
-        "firewall": ["firewall"],
-        "printer": ["printer"],
-        "iot": ["iot", "camera"],
-        "access-point": ["access-point", "ap"],
-    }
-
-    for device, keywords in device_map.items():
-        for keyword in keywords:
-            if keyword in context_str:
-                return device, 0.9, False # High confidence
+    device = match_keyword(context_str, _DEVICE_MATCHER)
+    if device:
+        return device, 0.9, False # High confidence
 
     # If no rule matches, it needs LLM
     return device_type_str, 0.3, True
 
-def process_row(row, anomalies):
-    """Processes a single row of inventory data."""
-    source_row_id = row.get("source_row_id", "")
-    processed = {key: None for key in TARGET_HEADERS}
-    processed["source_row_id"] = source_row_id
+def add_anomaly(anomalies, source_row_id, issue, action):
+    """Records an issue and its recommended action under the row's grouped entry."""
+    entry = anomalies.get(source_row_id)
+    if entry is None:
+        entry = anomalies[source_row_id] = {
+            "source_row_id": source_row_id,
+            "issues": [],
+            "recommended_actions": []
+        }
+    entry["issues"].append(issue)
+    entry["recommended_actions"].append(action)
+
+def process_row(fields, anomalies):
+    """Processes a single row of inventory data, given as values in INPUT_FIELDS order.
+
+    Returns the cleaned row as a list in TARGET_HEADERS order, and whether its
+    IP takes part in duplicate detection.
+    """
+    (source_row_id, raw_ip, hostname_field, fqdn_field, raw_mac,
+     raw_owner, raw_device_type, raw_site, raw_notes) = fields
+    processed = [None] * len(TARGET_HEADERS)
+    processed[IDX_SOURCE_ROW_ID] = source_row_id
     steps = []
 
     # --- IP Address ---
-    raw_ip = row.get("ip")
-    ip_valid, norm_ip, ip_ver, subnet, rev_ptr, ip_reason = validate_and_normalize_ip(raw_ip)
-    processed["ip"] = norm_ip
-    processed["ip_valid"] = ip_valid
+    ip_valid, norm_ip, ip_ver, subnet, rev_ptr, ip_special, ip_reason = validate_and_normalize_ip(raw_ip)
+    processed[IDX_IP] = norm_ip
+    processed[IDX_IP_VALID] = ip_valid
     if ip_valid:
-        processed["ip_version"] = ip_ver
-        processed["subnet_cidr"] = subnet
-        processed["reverse_ptr"] = rev_ptr
+        processed[IDX_IP_VERSION] = ip_ver
+        processed[IDX_SUBNET_CIDR] = subnet
+        processed[IDX_REVERSE_PTR] = rev_ptr
         steps.append("ip_normalized")
     else:
         if ip_reason != "missing":
-            anomalies.append({
-                "source_row_id": source_row_id,
-                "issues": [{"field": "ip", "type": ip_reason, "value": raw_ip}],
-                "recommended_actions": ["Correct IP or mark record for review"]
-            })
+            add_anomaly(anomalies, source_row_id,
+                        {"field": "ip", "type": ip_reason, "value": raw_ip},
+                        "Correct IP or mark record for review")
             steps.append(f"ip_invalid_{ip_reason}")
 
     # --- MAC Address ---
-    raw_mac = row.get("mac")
     mac_valid, norm_mac, mac_reason = normalize_and_validate_mac(raw_mac)
-    processed["mac"] = norm_mac
-    processed["mac_valid"] = mac_valid
+    processed[IDX_MAC] = norm_mac
+    processed[IDX_MAC_VALID] = mac_valid
     if mac_valid:
         steps.append("mac_normalized")
     else:
         if mac_reason == "invalid_format":
-            anomalies.append({
-                "source_row_id": source_row_id,
-                "issues": [{"field": "mac", "type": "invalid_format", "value": raw_mac}],
-                "recommended_actions": ["Correct MAC address to a standard format."]
-            })
+            add_anomaly(anomalies, source_row_id,
+                        {"field": "mac", "type": "invalid_format", "value": raw_mac},
+                        "Correct MAC address to a standard format.")
             steps.append("mac_invalid_format")
 
     # --- Hostname and FQDN ---
-    raw_hostname = row.get("hostname", "").strip()
-    raw_fqdn = row.get("fqdn", "").strip()
-    processed["hostname"] = raw_hostname
-    processed["fqdn"] = raw_fqdn
+    raw_hostname = hostname_field.strip()
+    raw_fqdn = fqdn_field.strip()
+    hostname_lower = raw_hostname.lower()
+    processed[IDX_HOSTNAME] = raw_hostname
+    processed[IDX_FQDN] = raw_fqdn
     
     hostname_valid, hostname_reason = validate_hostname(raw_hostname)
-    processed["hostname_valid"] = hostname_valid
+    processed[IDX_HOSTNAME_VALID] = hostname_valid
     if not hostname_valid and hostname_reason != "missing":
-        anomalies.append({
-            "source_row_id": source_row_id,
-            "issues": [{"field": "hostname", "type": hostname_reason, "value": raw_hostname}],
-            "recommended_actions": ["Ensure hostname follows RFC1123 standards."]
-        })
+        add_anomaly(anomalies, source_row_id,
+                    {"field": "hostname", "type": hostname_reason, "value": raw_hostname},
+                    "Ensure hostname follows RFC1123 standards.")
         steps.append(f"hostname_invalid_{hostname_reason}")
 
+    # Left as None when either side is blank
     if raw_fqdn and raw_hostname:
-        if raw_fqdn.startswith(raw_hostname):
-            processed["fqdn_consistent"] = True
-        else:
-            processed["fqdn_consistent"] = False
-            anomalies.append({
-                "source_row_id": source_row_id,
-                "issues": [{"field": "fqdn", "type": "inconsistent_with_hostname", "value": f"hostname: {raw_hostname}, fqdn: {raw_fqdn}"}],
-                "recommended_actions": ["Verify FQDN corresponds to hostname."]
-            })
+        fqdn_consistent = raw_fqdn.startswith(raw_hostname)
+        processed[IDX_FQDN_CONSISTENT] = fqdn_consistent
+        if not fqdn_consistent:
+            add_anomaly(anomalies, source_row_id,
+                        {"field": "fqdn", "type": "inconsistent_with_hostname", "value": f"hostname: {raw_hostname}, fqdn: {raw_fqdn}"},
+                        "Verify FQDN corresponds to hostname.")
             steps.append("fqdn_inconsistent")
 
     # --- Owner ---
-    raw_owner = row.get("owner", "")
-    processed["owner"] = raw_owner.strip()
-    if source_row_id in LLM_OWNER_OVERRIDES:
-        owner_result = LLM_OWNER_OVERRIDES[source_row_id]
-        processed["owner_email"] = owner_result["owner_email"]
-        processed["owner_team"] = owner_result["owner_team"]
+    processed[IDX_OWNER] = raw_owner.strip()
+    owner_result = LLM_OWNER_OVERRIDES.get(source_row_id)
+    if owner_result is not None:
+        processed[IDX_OWNER_EMAIL] = owner_result["owner_email"]
+        processed[IDX_OWNER_TEAM] = owner_result["owner_team"]
         steps.append("owner_from_llm")
     else:
         email, team = parse_owner(raw_owner)
-        processed["owner_email"] = email
-        processed["owner_team"] = team
+        processed[IDX_OWNER_EMAIL] = email
+        processed[IDX_OWNER_TEAM] = team
         if raw_owner and (email or team):
             steps.append("owner_parsed")
 
     # --- Site ---
-    raw_site = row.get("site", "")
-    norm_site = normalize_site(raw_site)
-    processed["site"] = raw_site.strip()
-    processed["site_normalized"] = norm_site
-    if norm_site and norm_site != raw_site.strip():
+    site = raw_site.strip()
+    norm_site = normalize_site(site)
+    processed[IDX_SITE] = site
+    processed[IDX_SITE_NORMALIZED] = norm_site
+    if norm_site and norm_site != site:
         steps.append("site_normalized")
 
     # --- Device Type ---
-    raw_device_type = row.get("device_type", "")
-    raw_notes = row.get("notes", "")
-
-    if source_row_id in LLM_CLASSIFICATIONS:
-        llm_result = LLM_CLASSIFICATIONS[source_row_id]
-        processed["device_type"] = llm_result["device_type"]
-        processed["device_type_confidence"] = llm_result["confidence"]
+    llm_result = LLM_CLASSIFICATIONS.get(source_row_id)
+    if llm_result is not None:
+        processed[IDX_DEVICE_TYPE] = llm_result["device_type"]
+        processed[IDX_DEVICE_TYPE_CONFIDENCE] = llm_result["confidence"]
         steps.append("device_type_from_llm")
     else:
         device_type, confidence, needs_llm = classify_device_type(raw_device_type, raw_notes)
-        processed["device_type"] = device_type
-        processed["device_type_confidence"] = confidence
+        processed[IDX_DEVICE_TYPE] = device_type
+        processed[IDX_DEVICE_TYPE_CONFIDENCE] = confidence
         if needs_llm:
             steps.append("device_type_requires_llm")
         else:
             steps.append("device_type_classified")
 
     # --- Final Anomaly Check for Remaining Blanks ---
-    final_check_fields = {
-        "fqdn": "FQDN is missing. If possible, derive from hostname or investigate source system.",
-        "mac": "MAC address is missing. This is a critical field for DHCP services.",
-        "site_normalized": "Site information is missing."
-    }
-
-    for field, message in final_check_fields.items():
-        if not processed.get(field):
-            anomalies.append({
-                "source_row_id": source_row_id,
-                "issues": [{"field": field, "type": "missing_value", "value": row.get(field, "")}],
-                "recommended_actions": [message + " Manual review required."]
-            })
+    for field, message in REQUIRED_FIELD_MESSAGES.items():
+        if not processed[IDX[field]]:
+            raw_value = fields[INPUT_FIELDS.index(field)] if field in INPUT_FIELDS else ""
+            add_anomaly(anomalies, source_row_id,
+                        {"field": field, "type": "missing_value", "value": raw_value},
+                        message + " Manual review required.")
             steps.append(f"{field}_missing")
 
     # Check for missing subnet_cidr (only if IP was valid)
-    if processed.get("ip_valid") and not processed.get("subnet_cidr"):
-        anomalies.append({
-            "source_row_id": source_row_id,
-            "issues": [{"field": "subnet_cidr", "type": "not_derived", "value": ""}],
-            "recommended_actions": ["Subnet CIDR was not derived (e.g., for public, loopback, or link-local IPs). Review if this is expected."]
-        })
+    if processed[IDX_IP_VALID] and not processed[IDX_SUBNET_CIDR]:
+        add_anomaly(anomalies, source_row_id,
+                    {"field": "subnet_cidr", "type": "not_derived", "value": ""},
+                    "Subnet CIDR was not derived (e.g., for public, loopback, or link-local IPs). Review if this is expected.")
         steps.append("subnet_cidr_not_derived")
 
     # Check for missing owner
     if not raw_owner:
-        anomalies.append({
-            "source_row_id": source_row_id,
-            "issues": [{"field": "owner", "type": "missing_value", "value": ""}],
-            "recommended_actions": ["Owner field is empty. Manual review required."]
-        })
+        add_anomaly(anomalies, source_row_id,
+                    {"field": "owner", "type": "missing_value", "value": ""},
+                    "Owner field is empty. Manual review required.")
         steps.append("owner_missing")
     # Check for unresolved owner (if field was not empty but couldn't be parsed)
-    elif raw_owner and not processed.get("owner_team") and not processed.get("owner_email"):
-        anomalies.append({
-            "source_row_id": source_row_id,
-            "issues": [{"field": "owner", "type": "unresolved_field", "value": raw_owner}],
-            "recommended_actions": ["Owner could not be parsed. Manual review required."]
-        })
+    elif raw_owner and not processed[IDX_OWNER_TEAM] and not processed[IDX_OWNER_EMAIL]:
+        add_anomaly(anomalies, source_row_id,
+                    {"field": "owner", "type": "unresolved_field", "value": raw_owner},
+                    "Owner could not be parsed. Manual review required.")
         steps.append("owner_unresolved")
 
     # Final check for 'unknown' device_type
-    if processed.get("device_type") == "unknown":
-        anomalies.append({
-            "source_row_id": source_row_id,
-            "issues": [{"field": "device_type", "type": "classified_as_unknown", "value": raw_device_type}],
-            "recommended_actions": ["Device type was classified as 'unknown'. Manual investigation is required."]
-        })
+    if processed[IDX_DEVICE_TYPE] == "unknown":
+        add_anomaly(anomalies, source_row_id,
+                    {"field": "device_type", "type": "classified_as_unknown", "value": raw_device_type},
+                    "Device type was classified as 'unknown'. Manual investigation is required.")
         steps.append("device_type_is_unknown")
     # Final check for unresolved device_type
-    elif not processed.get("device_type"):
-        anomalies.append({
-            "source_row_id": source_row_id,
-            "issues": [{"field": "device_type", "type": "unresolved_field", "value": raw_device_type}],
-            "recommended_actions": ["Device type could not be determined. Manual review required."]
-        })
+    elif not processed[IDX_DEVICE_TYPE]:
+        add_anomaly(anomalies, source_row_id,
+                    {"field": "device_type", "type": "unresolved_field", "value": raw_device_type},
+                    "Device type could not be determined. Manual review required.")
         steps.append("device_type_unresolved")
 
     # --- Cross-Field Consistency Check ---
-    hostname_lower = processed.get("hostname", "").lower()
-    final_device_type = processed.get("device_type")
+    final_device_type = processed[IDX_DEVICE_TYPE]
 
     if hostname_lower and final_device_type:
-        consistency_map = {
-            "server": ["server", "srv"],
-            "router": ["router", "rtr", "gw"],
-            "switch": ["switch", "sw"],
-            "firewall": ["firewall", "fw"],
-            "printer": ["printer", "print"],
-            "access-point": ["ap"]
-        }
+        inferred_type = match_keyword(hostname_lower, _HOSTNAME_MATCHER)
 
-        inferred_type = None
-        for dtype, keywords in consistency_map.items():
-            if inferred_type: break
-            for keyword in keywords:
-                if keyword in hostname_lower:
-                    inferred_type = dtype
-                    break
-        
         if inferred_type and inferred_type != final_device_type:
-            anomalies.append({
-                "source_row_id": source_row_id,
-                "issues": [{
-                    "field": "hostname/device_type",
-                    "type": "inconsistent_hostname_devicetype",
-                    "value": f"hostname is '{processed.get('hostname')}' but device_type is '{final_device_type}'"
-                }],
-                "recommended_actions": [f"Hostname suggests device should be a '{inferred_type}', but it is classified as '{final_device_type}'. Manual verification needed."]
-            })
+            add_anomaly(anomalies, source_row_id, {
+                "field": "hostname/device_type",
+                "type": "inconsistent_hostname_devicetype",
+                "value": f"hostname is '{raw_hostname}' but device_type is '{final_device_type}'"
+            }, f"Hostname suggests device should be a '{inferred_type}', but it is classified as '{final_device_type}'. Manual verification needed.")
             steps.append("inconsistent_host_type")
 
-    processed["normalization_steps"] = "|".join(steps)
-    return processed
-def main():
-    """Main function to run the data cleaning process."""
-    anomalies = []
-    cleaned_rows = []
+    processed[IDX_NORMALIZATION_STEPS] = "|".join(steps)
+    # Only check for duplicates on valid, non-special IPs
+    return processed, bool(ip_valid and norm_ip and not ip_special)
+
+def process_chunk(rows):
+    """Processes a batch of rows.
+
+    Returns the cleaned rows, a parallel list of their duplicate-IP flags and
+    the rows' grouped anomalies.
+    """
+    anomalies = {}
+    results = [process_row(fields, anomalies) for fields in rows]
+    cleaned_rows = [processed for processed, _ in results]
+    ip_counted = [counted for _, counted in results]
+    return cleaned_rows, ip_counted, anomalies
+
+def read_chunks(reader, get_fields, width):
+    """Yields lists of up to CHUNK_SIZE rows from the reader, in INPUT_FIELDS order."""
+    rows = []
+    for row in reader:
+        if not row:
+            continue  # Blank line
+        if len(row) < width:
+            row += [""] * (width - len(row))
+        rows.append(get_fields(row))
+        if len(rows) == CHUNK_SIZE:
+            yield rows
+            rows = []
+    if rows:
+        yield rows
+
+def process_chunks(chunks):
+    """Yields process_chunk results in input order, spreading chunks over worker processes.
+
+    An input that fits in one chunk is processed inline, as starting the pool
+    would cost more than it saves. Rows are also processed inline when WORKERS
+    is 1 or the platform cannot create a process pool. Only a couple of chunks
+    per worker are in flight at once so the input is still streamed.
+    """
+    head = list(islice(chunks, 2))
+    if len(head) < 2 or WORKERS == 1:
+        yield from map(process_chunk, chain(head, chunks))
+        return
 
     try:
-        with open(INPUT_CSV, mode='r', newline='', encoding='utf-8') as infile:
-            raw_data = list(csv.DictReader(infile))
-        
-        for row in raw_data:
-            processed = process_row(row, anomalies)
-            cleaned_rows.append(processed)
+        executor = ProcessPoolExecutor(max_workers=WORKERS)
+    except (OSError, NotImplementedError):
+        # No process semaphores here (e.g. missing /dev/shm); run serially
+        yield from map(process_chunk, chain(head, chunks))
+        return
 
+    max_pending = 2 * (WORKERS or os.cpu_count() or 1)
+    pending = deque()
+    with executor:
+        for chunk in chain(head, chunks):
+            pending.append(executor.submit(process_chunk, chunk))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def write_clean_rows(outfile, writer, rows):
+    """Writes cleaned rows, joining plain rows directly and using csv.writer only where quoting is needed."""
+    separators = len(TARGET_HEADERS) - 1
+    terminator = writer.dialect.lineterminator
+    lines = []
+    for row in rows:
+        line = ','.join(['' if value is None else str(value) for value in row])
+        # An extra comma means a field contained one; quotes and line breaks need quoting too
+        if line.count(',') == separators and '"' not in line and '\n' not in line and '\r' not in line:
+            lines.append(line + terminator)
+        else:
+            outfile.write(''.join(lines))
+            lines = []
+            writer.writerow(row)
+    outfile.write(''.join(lines))
+
+def main():
+    """Main function to run the data cleaning process."""
+    try:
+        infile = open(INPUT_CSV, mode='r', newline='', encoding='utf-8')
     except FileNotFoundError:
         print(f"Error: Input file not found at {INPUT_CSV}")
         return
 
-    with open(OUTPUT_CSV, mode='w', newline='', encoding='utf-8') as outfile:
-        writer = csv.DictWriter(outfile, fieldnames=TARGET_HEADERS, extrasaction='ignore')
-        writer.writeheader()
-        writer.writerows(cleaned_rows)
-    print(f"Successfully wrote cleaned data to {OUTPUT_CSV}")
+    # Rows are written as soon as they are processed; anomalies are grouped by
+    # source_row_id as they are raised, which is the shape they are written in.
+    anomalies = {}
+    with infile:
+        reader = csv.reader(infile)
+        header = next(reader, [])
+
+        # Resolve column positions once; rows are then read by index.
+        # Columns absent from the header read as blank.
+        columns = {name: i for i, name in enumerate(header)}
+        positions = [columns.get(name) for name in INPUT_FIELDS]
+        if None in positions:
+            def get_fields(row):
+                return tuple("" if i is None else row[i] for i in positions)
+        else:
+            get_fields = itemgetter(*positions)
+        width = len(header)
+
+        # --- Duplicate Value Detection ---
+        ip_counts = defaultdict(list)
+        mac_counts = defaultdict(list)
+        hostname_counts = defaultdict(list)
+
+        with open(OUTPUT_CSV, mode='w', newline='', encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE) as outfile:
+            writer = csv.writer(outfile)
+            writer.writerow(TARGET_HEADERS)
+
+            for cleaned_rows, ip_counted, chunk_anomalies in process_chunks(read_chunks(reader, get_fields, width)):
+                write_clean_rows(outfile, writer, cleaned_rows)
+
+                # Merge in the chunk's anomalies, keeping first-seen row order
+                for row_id, entry in chunk_anomalies.items():
+                    existing = anomalies.get(row_id)
+                    if existing is None:
+                        anomalies[row_id] = entry
+                    else:
+                        existing["issues"].extend(entry["issues"])
+                        existing["recommended_actions"].extend(entry["recommended_actions"])
+
+                for processed, count_ip in zip(cleaned_rows, ip_counted):
+                    # Count occurrences of values as rows stream past. Whether
+                    # the IP is counted was decided in the worker.
+                    if count_ip:
+                        ip_counts[processed[IDX_IP]].append(processed[IDX_SOURCE_ROW_ID])
+
+                    if processed[IDX_MAC_VALID] and processed[IDX_MAC]:
+                        mac_counts[processed[IDX_MAC]].append(processed[IDX_SOURCE_ROW_ID])
+
+                    if processed[IDX_HOSTNAME_VALID] and processed[IDX_HOSTNAME]:
+                        hostname_counts[processed[IDX_HOSTNAME].lower()].append(processed[IDX_SOURCE_ROW_ID])
 
-    # --- Duplicate Value Detection ---
-    ip_counts = {}
-    mac_counts = {}
-    hostname_counts = {}
-
-    # First pass: count occurrences of values
-    for row in cleaned_rows:
-        # Only check for duplicates on valid, non-special IPs
-        if row.get("ip_valid") and row.get("ip"):
-            try:
-                ip_obj = ipaddress.ip_address(row["ip"])
-                if not (ip_obj.is_loopback or ip_obj.is_link_local or ip_obj.is_multicast or ip_obj.is_unspecified):
-                    ip_counts.setdefault(row["ip"], []).append(row["source_row_id"])
-            except ValueError:
-                pass  # Ignore errors on values that might be invalid despite the flag
-
-        if row.get("mac_valid") and row.get("mac"):
-            mac_counts.setdefault(row["mac"], []).append(row["source_row_id"])
-        
-        if row.get("hostname_valid") and row.get("hostname"):
-            hostname_counts.setdefault(row["hostname"].lower(), []).append(row["source_row_id"])
+    print(f"Successfully wrote cleaned data to {OUTPUT_CSV}")
 
-    # Second pass: create anomalies for any duplicates found
+    # Create anomalies for any duplicates found; every row of a group shares
+    # one row_ids tuple.
     duplicate_checks = {
         "ip": ip_counts,
         "mac": mac_counts,
@@ -417,40 +617,28 @@ def main():
     }
 
     for field, counts in duplicate_checks.items():
+        action = f"This {field} is a duplicate. See 'duplicated_in_rows' for all conflicting records."
         for value, row_ids in counts.items():
             if len(row_ids) > 1:
                 # This value is a duplicate, create an anomaly for all rows that have it
+                shared_row_ids = tuple(row_ids)
                 for row_id in row_ids:
-                    anomalies.append({
-                        "source_row_id": row_id,
-                        "issues": [{
-                            "field": field,
-                            "type": "duplicate_value",
-                            "value": value,
-                            "duplicated_in_rows": row_ids
-                        }],
-                        "recommended_actions": [f"This {field} is a duplicate. See 'duplicated_in_rows' for all conflicting records."]
-                    })
-
-    # Group anomalies by source_row_id
-    grouped_anomalies = {}
-    for anomaly in anomalies:
-        row_id = anomaly["source_row_id"]
-        if row_id not in grouped_anomalies:
-            grouped_anomalies[row_id] = {
-                "source_row_id": row_id,
-                "issues": [],
-                "recommended_actions": []
-            }
-        # Extend the list of issues and actions for that row_id
-        grouped_anomalies[row_id]["issues"].extend(anomaly["issues"])
-        if "recommended_actions" in anomaly:
-            grouped_anomalies[row_id]["recommended_actions"].extend(anomaly["recommended_actions"])
-    
-    final_anomalies_list = list(grouped_anomalies.values())
-
-    with open(ANOMALIES_JSON, mode='w', encoding='utf-8') as outfile:
-        json.dump(final_anomalies_list, outfile, indent=2)
+                    add_anomaly(anomalies, row_id, {
+                        "field": field,
+                        "type": "duplicate_value",
+                        "value": value,
+                        "duplicated_in_rows": shared_row_ids
+                    }, action)
+
+    final_anomalies_list = list(anomalies.values())
+
+    # Both writers emit non-ASCII text as raw UTF-8, so the bytes do not depend
+    # on whether orjson is installed
+    if orjson is not None:
+        ANOMALIES_JSON.write_bytes(orjson.dumps(final_anomalies_list, option=orjson.OPT_INDENT_2))
+    else:
+        with open(ANOMALIES_JSON, mode='w', encoding='utf-8') as outfile:
+            json.dump(final_anomalies_list, outfile, indent=2, ensure_ascii=False)
     print(f"Successfully wrote anomalies to {ANOMALIES_JSON}")
 
 if __name__ == "__main__":